@@ -1,37 +1,280 @@
 # expense_tracker.py
+import csv
+import io
 import os
+import threading
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.figure import Figure
 import streamlit as st
 
+try:
+    from numba import njit
+except ImportError:  # optional: falls back to np.bincount
+    njit = None
+
+# -------------------------
+# Cached helpers
+# -------------------------
+if njit is not None:
+    @njit
+    def _category_agg(codes, amounts, k):
+        # Totals and counts in one fused pass; code -1 is a missing category
+        totals = np.zeros(k)
+        counts = np.zeros(k, np.int64)
+        for i in range(codes.size):
+            c = codes[i]
+            if c >= 0:
+                totals[c] += amounts[i]
+                counts[c] += 1
+        return totals, counts
+else:
+    def _category_agg(codes, amounts, k):
+        valid = codes >= 0
+        totals = np.bincount(codes[valid], weights=amounts[valid], minlength=k)
+        counts = np.bincount(codes[valid], minlength=k)
+        return totals, counts
+
+
+def _write_csv(df, f):
+    # Plain csv.writer over column lists: much cheaper than DataFrame.to_csv's cell formatter
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(df.columns)
+    dates = df["Date"].dt.strftime("%Y-%m-%d").tolist()
+    amounts = df["Amount"].tolist()
+    categories = df["Category"].astype(object).fillna("").tolist()
+    descriptions = df["Description"].astype(object).fillna("").tolist()
+    writer.writerows(zip(dates, amounts, categories, descriptions))
+
+
+def _csv_text(df):
+    buf = io.StringIO()
+    _write_csv(df, buf)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _csv_bytes(_df, key):
+    return _csv_text(_df).encode()
+
+
+def _csv_stamp(csv_path):
+    # Identifies one version of the CSV. Matched exactly rather than compared by age:
+    # a restored backup or `cp -p` can bring back a file older than the Parquet copy.
+    if not os.path.exists(csv_path):
+        return None
+    info = os.stat(csv_path)
+    return (info.st_mtime_ns, info.st_size)
+
+
+def _write_parquet(df, parquet_path, stamp):
+    # The parquet copy is only a cache of the CSV, so failing to write it is not an error.
+    # Write aside and swap in, so readers never see a half-written file.
+    tmp_path = f"{parquet_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    out = df.copy(deep=False)
+    out.attrs = {"csv_stamp": list(stamp)}
+    try:
+        out.to_parquet(tmp_path, compression="snappy", index=False)
+        os.replace(tmp_path, parquet_path)
+    except (ImportError, OSError, ValueError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@st.cache_data(show_spinner=False)
+def _load_df(csv_path, parquet_path, stamp, columns):
+    # stamp is only part of the cache key: editing the file invalidates the entry
+    if stamp is None:
+        return pd.DataFrame(columns=list(columns)).astype({"Date": "datetime64[ns]", "Amount": "float64", "Category": "category"})
+    df = None
+    if os.path.exists(parquet_path):
+        try:
+            df = pd.read_parquet(parquet_path)
+        except (ImportError, OSError, ValueError):
+            # Unreadable copy: fall through and rebuild it from the CSV
+            pass
+        if df is not None and df.attrs.get("csv_stamp") != list(stamp):
+            # Built from a different version of the CSV
+            df = None
+    if df is not None:
+        cats = df["Category"]
+        if not isinstance(cats.dtype, pd.CategoricalDtype) or not pd.api.types.is_string_dtype(cats.cat.categories):
+            # Copies written before labels were read as text may hold numeric categories
+            df["Category"] = cats.map(str, na_action="ignore").astype("category")
+        if not df["Date"].is_monotonic_increasing:
+            df = df.sort_values("Date", kind="stable").reset_index(drop=True)
+        return df
+    # Category is read as text: Arrow would otherwise infer numeric labels such as "2024" as ints
+    dtype = {"Amount": "float64", "Category": "str", "Description": "str"}
+    try:
+        # Single typed pass with Arrow's multithreaded reader
+        df = pd.read_csv(csv_path, engine="pyarrow", usecols=list(columns), dtype=dtype, parse_dates=["Date"], date_format="ISO8601")
+    except (ImportError, ValueError):
+        # No pyarrow, or an Amount Arrow can't cast: parse loosely and coerce bad values to NaN
+        df = pd.read_csv(csv_path, usecols=list(columns), dtype={"Category": "str", "Description": "str"})
+        df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce")
+    if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        # Some value wasn't ISO 8601 (hand edits): parse ISO in bulk, infer only the rest per row
+        raw = df["Date"]
+        dates = pd.to_datetime(raw, format="ISO8601", errors="coerce", cache=True)
+        rest = dates.isna() & raw.notna()
+        if rest.any():
+            dates[rest] = pd.to_datetime(raw[rest], format="mixed", errors="coerce")
+        df["Date"] = dates
+    df = df.dropna(subset=["Date", "Amount"])
+    df["Category"] = df["Category"].astype("category")
+    # Kept sorted by Date so date-range filters can binary search
+    df = df[list(columns)].sort_values("Date", kind="stable").reset_index(drop=True)
+    _write_parquet(df, parquet_path, stamp)
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _summarize(_df, key):
+    df = _df
+    if df.empty:
+        return {
+            "total": 0.0,
+            "average": 0.0,
+            "median": 0.0,
+            "count": 0,
+            "by_category": pd.DataFrame(columns=["Category", "Total", "Average", "Count"]),
+        }
+    arr = df["Amount"].to_numpy()
+    count = int(arr.size)
+    total = float(arr.sum())
+    average = total / count
+    # O(n) selection of the middle element(s) instead of the full sort np.median does
+    lo, hi = (count - 1) // 2, count // 2
+    part = np.partition(arr, [lo, hi])
+    median = float((part[lo] + part[hi]) / 2)
+    # Aggregate over the categorical codes directly; cheaper than groupby at this scale
+    cats = df["Category"].cat
+    cat_totals, cat_counts = _category_agg(cats.codes.to_numpy(), arr, len(cats.categories))
+    seen = cat_counts > 0
+    by_cat = pd.DataFrame(
+        {
+            "Category": cats.categories[seen],
+            "Total": cat_totals[seen],
+            "Average": cat_totals[seen] / cat_counts[seen],
+            "Count": cat_counts[seen],
+        }
+    ).sort_values("Total", ascending=False)
+    return {"total": total, "average": average, "median": median, "count": count, "by_category": by_cat}
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _monthly(_df, key):
+    df = _df
+    # Truncating datetime64 to month precision is a plain cast, no Period objects
+    ym = df["Date"].to_numpy().astype("datetime64[M]")
+    monthly = pd.DataFrame({"YearMonth": ym, "Amount": df["Amount"].to_numpy()})
+    return monthly.groupby("YearMonth", sort=True)["Amount"].sum().reset_index()
+
+
+def _png(fig):
+    # Same output st.pyplot would produce, rendered once so the bytes can be cached
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
+    return buf.getvalue()
+
+
+# Figures are built with matplotlib.figure.Figure rather than pyplot: no global
+# figure registry, and each cached call works on its own object, so concurrent
+# sessions never share a Figure. Only the rendered PNG bytes are cached.
+@st.cache_data(show_spinner=False, max_entries=4)
+def _bar_png(by_cat_rows):
+    labels, totals = zip(*by_cat_rows)
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.bar(labels, totals)
+    ax.set_xlabel("Category")
+    ax.set_ylabel("Total")
+    ax.set_title("Total spend by category")
+    ax.tick_params(axis="x", labelrotation=45)
+    return _png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _line_png(monthly_rows):
+    months, amounts = zip(*monthly_rows)
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
+    ax.plot(months, amounts, marker="o")
+    ax.set_title("Monthly spending")
+    ax.tick_params(axis="x", labelrotation=45)
+    return _png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _pie_png(by_cat_rows):
+    labels, totals = zip(*by_cat_rows)
+    fig = Figure(figsize=(6, 6))
+    ax = fig.subplots()
+    ax.pie(totals, labels=labels, autopct="%1.1f%%", startangle=140)
+    ax.set_title("Spending distribution by category")
+    return _png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _hist_png(_amounts, key):
+    counts, edges = np.histogram(_amounts, bins=20)
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge")
+    ax.set_title("Distribution of expense amounts")
+    return _png(fig)
+
 # -------------------------
 # ExpenseTracker Class
 # -------------------------
 class ExpenseTracker:
     def __init__(self, csv_path="expenses.csv"):
         self.csv_path = csv_path
+        self.parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
         self.columns = ["Date", "Amount", "Category", "Description"]
         self.df = self._load_or_create()
+        self._key = None
+        self._cats = {str(c) for c in self.df["Category"].cat.categories}
 
     def _load_or_create(self):
-        if os.path.exists(self.csv_path):
-            df = pd.read_csv(self.csv_path)
-            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-            df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce")
-            df = df.dropna(subset=["Date", "Amount"])
-            return df[self.columns]
-        else:
-            return pd.DataFrame(columns=self.columns)
+        return _load_df(self.csv_path, self.parquet_path, _csv_stamp(self.csv_path), tuple(self.columns))
+
+    def _data_key(self):
+        # Identifies the data version for the st.cache_* helpers; reset whenever df changes
+        if self._key is None:
+            self._key = (len(self.df), float(self.df["Amount"].sum()), _csv_stamp(self.csv_path))
+        return self._key
 
 
     def save(self):
-        df = self.df.copy()
-        df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
-        df.to_csv(self.csv_path, index=False)
+        with open(self.csv_path, "w", newline="") as f:
+            _write_csv(self.df, f)
+
+    def _append_row(self, row):
+        if not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0:
+            with open(self.csv_path, "w", newline="") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(self.columns)
+                writer.writerow([row[c] for c in self.columns])
+            return
+        with open(self.csv_path, newline="") as f:
+            header = next(csv.reader(f), [])
+        if sorted(header) != sorted(self.columns):
+            # Header we can't map a row onto: rewrite the file from self.df instead
+            self.save()
+            return
+        with open(self.csv_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            # A hand-edited file may lack a final newline; don't glue the row onto its last line
+            needs_newline = f.read(1) not in (b"\n", b"\r")
+        with open(self.csv_path, "a", newline="") as f:
+            if needs_newline:
+                f.write("\n")
+            # Follow the file's own column order, which may differ from self.columns
+            csv.writer(f, lineterminator="\n").writerow([row[c] for c in header])
 
     def add_expense(self, date, amount, category, description=""):
         if amount is None:
@@ -42,50 +285,47 @@ class ExpenseTracker:
             raise ValueError("Amount must be numeric")
         if amount <= 0:
             raise ValueError("Amount must be positive")
-        date = pd.to_datetime(date).date()
-        new_row = {
-            "Date": pd.to_datetime(date),
-            "Amount": amount,
-            "Category": str(category).strip(),
-            "Description": str(description).strip(),
-        }
-        self.df = pd.concat([self.df, pd.DataFrame([new_row])], ignore_index=True)
-        self.save()
+        # Day precision, then a cast to the column's datetime64 type: no string parsing
+        day = np.datetime64(date, "D")
+        if np.isnat(day):
+            raise ValueError("Date required")
+        stamp = day.astype("datetime64[ns]")
+        category = str(category).strip()
+        description = str(description).strip()
+        if category not in self.df["Category"].cat.categories:
+            self.df["Category"] = self.df["Category"].cat.add_categories([category])
+        self._cats.add(category)
+        in_order = self.df.empty or self.df["Date"].iat[-1] <= stamp
+        self.df.loc[len(self.df), self.columns] = [stamp, amount, category, description]
+        if not in_order:
+            self.df = self.df.sort_values("Date", kind="stable").reset_index(drop=True)
+        self._append_row({"Date": str(day), "Amount": amount, "Category": category, "Description": description})
+        _load_df.clear()
+        self._key = None
 
     def get_summary(self):
-        if self.df.empty:
-            return {
-                "total": 0.0,
-                "average": 0.0,
-                "median": 0.0,
-                "count": 0,
-                "by_category": pd.DataFrame(columns=["Category", "Total", "Average", "Count"]),
-            }
-        total = float(self.df["Amount"].sum())
-        average = float(self.df["Amount"].mean())
-        median = float(np.median(self.df["Amount"].values))
-        count = int(self.df.shape[0])
-        by_cat = (
-            self.df.groupby("Category")["Amount"]
-            .agg(Total="sum", Average="mean", Count="count")
-            .reset_index()
-            .sort_values("Total", ascending=False)
-        )
-        return {"total": total, "average": average, "median": median, "count": count, "by_category": by_cat}
+        return _summarize(self.df, self._data_key())
 
     def filter_expenses(self, category=None, start_date=None, end_date=None, min_amount=None, max_amount=None):
-        df = self.df.copy()
+        df = self.df
+        # df is sorted by Date, so the date range is a contiguous slice
+        dates = df["Date"].to_numpy()
+        lo = np.searchsorted(dates, np.datetime64(start_date), "left") if start_date else 0
+        hi = np.searchsorted(dates, np.datetime64(end_date), "right") if end_date else len(dates)
+        df = df.iloc[lo:hi]
+        mask = np.ones(len(df), dtype=bool)
         if category and category != "All":
-            df = df[df["Category"] == category]
-        if start_date:
-            df = df[df["Date"] >= pd.to_datetime(start_date)]
-        if end_date:
-            df = df[df["Date"] <= pd.to_datetime(end_date)]
+            cats = df["Category"].cat
+            if category in cats.categories:
+                mask &= cats.codes.to_numpy() == cats.categories.get_loc(category)
+            else:
+                mask[:] = False
         if min_amount is not None:
-            df = df[df["Amount"] >= float(min_amount)]
+            mask &= df["Amount"].values >= float(min_amount)
         if max_amount is not None:
-            df = df[df["Amount"] <= float(max_amount)]
-        return df.sort_values("Date")
+            mask &= df["Amount"].values <= float(max_amount)
+        # Already in Date order: the slice and mask both preserve the frame's sort
+        return df.iloc[np.flatnonzero(mask)]
 
     def generate_report(self, save_path="expense_report_summary.csv"):
         summary = self.get_summary()
@@ -110,9 +350,8 @@ with st.sidebar:
     with st.form("add_expense_form", clear_on_submit=True):
         date = st.date_input("Date", value=datetime.today())
         amount = st.number_input("Amount (₹)", min_value=0.0, format="%.2f")
-        existing_cats = sorted(list(set(tracker.df["Category"].dropna().unique()))) if not tracker.df.empty else []
         default_cats = ["Food", "Transport", "Utilities", "Shopping", "Entertainment", "Other"]
-        categories = list(dict.fromkeys(existing_cats + default_cats))
+        categories = sorted(tracker._cats | set(default_cats))
         category = st.selectbox("Category", options=["All"] + categories, index=categories.index("Food") + 1 if "Food" in categories else 0)
         description = st.text_input("Description (optional)")
         add_btn = st.form_submit_button("Add Expense")
@@ -139,9 +378,7 @@ with st.sidebar:
 
     st.markdown("---")
     if st.button("Download CSV of current data"):
-        csv_buf = tracker.df.copy()
-        csv_buf["Date"] = pd.to_datetime(csv_buf["Date"]).dt.strftime("%Y-%m-%d")
-        towrite = csv_buf.to_csv(index=False).encode()
+        towrite = _csv_bytes(tracker.df, tracker._data_key())
         st.download_button("Download expenses.csv", data=towrite, file_name="expenses.csv", mime="text/csv")
 
 # Apply filters
@@ -153,6 +390,7 @@ filtered_df = tracker.filter_expenses(category=f_category, start_date=start_date
 
 # Metrics
 summary = tracker.get_summary()
+by_category = summary["by_category"]
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Total Spent", f"₹ {summary['total']:.2f}")
 col2.metric("Average Expense", f"₹ {summary['average']:.2f}")
@@ -161,47 +399,32 @@ col4.metric("Transactions", f"{summary['count']}")
 
 # Table
 st.subheader("Filtered Transactions")
-st.dataframe(filtered_df.sort_values("Date", ascending=False).reset_index(drop=True))
-csv_bytes = filtered_df.copy()
-csv_bytes["Date"] = pd.to_datetime(csv_bytes["Date"]).dt.strftime("%Y-%m-%d")
-st.download_button("Download Filtered CSV", data=csv_bytes.to_csv(index=False), file_name="filtered_expenses.csv")
+# Newest first: reverse the ascending frame instead of sorting it again
+st.dataframe(filtered_df.iloc[::-1].reset_index(drop=True))
+# Serialized only when the button is actually clicked
+filter_key = (tracker._data_key(), f_category, start_date, end_date, min_amount, max_amount)
+st.download_button("Download Filtered CSV", data=lambda: _csv_bytes(filtered_df, filter_key), file_name="filtered_expenses.csv", mime="text/csv")
 
 # Visualizations
 st.subheader("Visualizations")
 # Bar chart
-if not summary["by_category"].empty:
-    fig1, ax1 = plt.subplots(figsize=(8, 4))
-    sns.barplot(data=summary["by_category"], x="Category", y="Total", ax=ax1)
-    ax1.set_title("Total spend by category")
-    plt.xticks(rotation=45)
-    st.pyplot(fig1)
+if not by_category.empty:
+    by_cat_rows = tuple(by_category[["Category", "Total"]].itertuples(index=False, name=None))
+    st.image(_bar_png(by_cat_rows), width="stretch")
 # Line chart
 if not tracker.df.empty:
-    df_time = tracker.df.copy()
-    df_time["YearMonth"] = df_time["Date"].dt.to_period("M").dt.to_timestamp()
-    monthly = df_time.groupby("YearMonth")["Amount"].sum().reset_index()
-    fig2, ax2 = plt.subplots(figsize=(10, 4))
-    ax2.plot(monthly["YearMonth"], monthly["Amount"], marker="o")
-    ax2.set_title("Monthly spending")
-    plt.xticks(rotation=45)
-    st.pyplot(fig2)
+    monthly = _monthly(tracker.df, tracker._data_key())
+    st.image(_line_png(tuple(monthly.itertuples(index=False, name=None))), width="stretch")
 # Pie chart
-if not summary["by_category"].empty:
-    pie_data = summary["by_category"]
-    fig3, ax3 = plt.subplots(figsize=(6, 6))
-    ax3.pie(pie_data["Total"], labels=pie_data["Category"], autopct="%1.1f%%", startangle=140)
-    ax3.set_title("Spending distribution by category")
-    st.pyplot(fig3)
+if not by_category.empty:
+    st.image(_pie_png(by_cat_rows), width="stretch")
 # Histogram
 if not tracker.df.empty:
-    fig4, ax4 = plt.subplots(figsize=(8, 4))
-    ax4.hist(tracker.df["Amount"], bins=20)
-    ax4.set_title("Distribution of expense amounts")
-    st.pyplot(fig4)
+    st.image(_hist_png(tracker.df["Amount"].to_numpy(), tracker._data_key()), width="stretch")
 
 st.markdown("---")
 st.subheader("Category-wise Summary")
-st.table(summary["by_category"].head(20))
+st.table(by_category.head(20))
 
 # Actions
 colA, colB = st.columns(2)
@@ -215,6 +438,9 @@ with colB:
     if st.button("Reset all data (Deletes expenses.csv)"):
         if os.path.exists(tracker.csv_path):
             os.remove(tracker.csv_path)
+        if os.path.exists(tracker.parquet_path):
+            os.remove(tracker.parquet_path)
+        _load_df.clear()
         tracker.df = tracker._load_or_create()
         st.success("All data cleared.")
         st.rerun()